@@ -5,38 +5,122 @@ This file contains the complete backend with all models, routes, and ML predicti
 """
 
 from flask import Flask, request, jsonify, render_template_string
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+from sqlalchemy import and_, bindparam, event, func, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, get_jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import os
-import json
+import sqlite3
 import random
+import secrets
 import uuid
+import decimal
+import functools
+from itertools import islice
+import hmac
+import threading
+import time
+import numpy as np
+import orjson
+import redis
+
+# =============================================================================
+# JSON SERIALIZATION
+# =============================================================================
+
+def _orjson_default(obj):
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def _orjson_dumps_str(obj):
+    return orjson.dumps(obj, default=_orjson_default).decode()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson; datetimes are serialized natively as UTC."""
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode()
+    
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_orjson_default, option=self.option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configuration
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///digital_twin.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool sizing relies on SQLAlchemy 2.x giving file-based SQLite a QueuePool (1.4 used NullPool)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+    'pool_pre_ping': True,
+    'json_serializer': _orjson_dumps_str,
+    'json_deserializer': orjson.loads
+}
 app.config['JWT_SECRET_KEY'] = 'jwt-secret-key-change-in-production'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+# scrypt N=2**14, r=8, p=1 verifies in roughly 50-70 ms on a typical server core
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+app.config['PASSWORD_HASH_BUDGET_MS'] = 100
 
 # Initialize extensions
 db = SQLAlchemy(app)
 jwt = JWTManager(app)
 CORS(app, origins=["*"], allow_headers=["Content-Type", "Authorization"])
+# Short timeouts so an unreachable cache degrades to database reads instead of stalling requests
+redis_client = redis.Redis.from_url(app.config['REDIS_URL'], socket_connect_timeout=0.1, socket_timeout=0.1)
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a write is in progress
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-20000')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
 
 # =============================================================================
 # DATABASE MODELS
 # =============================================================================
 
+def response_columns(model):
+    # Columns selected when list endpoints build response dicts without ORM instances
+    return [column for column in model.__table__.columns if column.key != 'user_id']
+
+@functools.lru_cache(maxsize=None)
+def password_hash_prefix(method):
+    # Werkzeug stores short methods expanded ("scrypt" as "scrypt:32768:8:1"), so the stored
+    # prefix is learned from one real hash rather than compared against the configured string
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    public_id = db.Column(db.String(50), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    public_id = db.Column(db.String(50), unique=True, nullable=False, default=lambda: secrets.token_urlsafe(16))
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     first_name = db.Column(db.String(100), nullable=False)
@@ -46,14 +130,19 @@ class User(db.Model):
     height = db.Column(db.Float)
     weight = db.Column(db.Float)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password, method=app.config['PASSWORD_HASH_METHOD'], salt_length=16
+        )
+    
+    def password_needs_rehash(self):
+        return self.password_hash.split('$', 1)[0] != password_hash_prefix(app.config['PASSWORD_HASH_METHOD'])
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -61,14 +150,29 @@ class User(db.Model):
             'email': self.email,
             'firstName': self.first_name,
             'lastName': self.last_name,
-            'dateOfBirth': self.date_of_birth.isoformat() if self.date_of_birth else None,
+            'dateOfBirth': self.date_of_birth,
             'gender': self.gender,
             'height': self.height,
             'weight': self.weight,
             'isActive': self.is_active,
-            'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat()
+            'createdAt': self.created_at,
+            'updatedAt': self.updated_at
         }
+    
+    def to_dict_light(self):
+        # Minimal payload for list views; detail endpoints use to_dict()
+        return {
+            'id': self.public_id,
+            'firstName': self.first_name,
+            'lastName': self.last_name
+        }
+
+STRESS_LEVELS = ("Unknown", "Very Low", "Low", "Moderate", "High", "Very High")
+
+def stress_level_text(stress_level):
+    if stress_level is None:
+        return None
+    return STRESS_LEVELS[stress_level] if 1 <= stress_level <= 5 else STRESS_LEVELS[0]
 
 class HealthMetric(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -93,43 +197,85 @@ class HealthMetric(db.Model):
     social_interactions = db.Column(db.Integer, default=0)
     measurement_timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     device_source = db.Column(db.String(100))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        db.Index('ix_hm_user_time', user_id, measurement_timestamp),
+    )
     
     def get_stress_level_text(self):
-        if self.stress_level is None:
-            return None
-        levels = {1: "Very Low", 2: "Low", 3: "Moderate", 4: "High", 5: "Very High"}
-        return levels.get(self.stress_level, "Unknown")
+        return stress_level_text(self.stress_level)
     
-    def to_dict(self):
+    @classmethod
+    def dicts_for_user(cls, user_id, since, before=None, limit=None):
+        rows = cls._history_page(response_columns(cls), user_id, since, before, limit)
+        return [cls.row_to_dict(row) for row in rows]
+    
+    @classmethod
+    def history_rows(cls, user_id, since, metric_column, *extra_columns, before=None, limit=None):
+        # Only rows with a non-zero reading for metric_column; "!= 0" also drops NULLs in SQL
+        columns = (cls.id, cls.measurement_timestamp, metric_column, *extra_columns)
+        return cls._history_page(columns, user_id, since, before, limit, metric_column != 0)
+    
+    @classmethod
+    def _history_page(cls, columns, user_id, since, before, limit, *criteria):
+        # Keyset pagination walking back from the newest reading: "before" is the id of the oldest
+        # row the client has seen, with (timestamp, id) ordering so equal timestamps aren't skipped.
+        # The page is returned oldest first for charting, so its first row is the next cursor.
+        query = db.session.query(*columns).filter(
+            cls.user_id == user_id,
+            cls.measurement_timestamp >= since,
+            *criteria
+        )
+        if before is not None:
+            cursor_timestamp = select(cls.measurement_timestamp).where(cls.id == before).scalar_subquery()
+            query = query.filter(or_(
+                cls.measurement_timestamp < cursor_timestamp,
+                and_(cls.measurement_timestamp == cursor_timestamp, cls.id < before)
+            ))
+        rows = query.order_by(cls.measurement_timestamp.desc(), cls.id.desc()).limit(limit).all()
+        rows.reverse()
+        return rows
+    
+    @staticmethod
+    def row_to_dict(row):
         return {
-            'id': self.id,
-            'heartRate': self.heart_rate,
+            'id': row.id,
+            'heartRate': row.heart_rate,
             'bloodPressure': {
-                'systolic': self.blood_pressure_systolic,
-                'diastolic': self.blood_pressure_diastolic
-            } if self.blood_pressure_systolic else None,
-            'oxygenSaturation': self.oxygen_saturation,
-            'stressLevel': self.get_stress_level_text(),
+                'systolic': row.blood_pressure_systolic,
+                'diastolic': row.blood_pressure_diastolic
+            } if row.blood_pressure_systolic else None,
+            'oxygenSaturation': row.oxygen_saturation,
+            'stressLevel': stress_level_text(row.stress_level),
             'sleepData': {
-                'duration': self.sleep_duration,
-                'qualityScore': self.sleep_quality_score,
-                'deepSleep': self.deep_sleep_duration,
-                'lightSleep': self.light_sleep_duration,
-                'remSleep': self.rem_sleep_duration
-            } if self.sleep_duration else None,
-            'stepsCount': self.steps_count,
-            'caloriesBurned': self.calories_burned,
-            'distanceTraveled': self.distance_traveled,
-            'activeMinutes': self.active_minutes,
-            'moodRating': self.mood_rating,
-            'waterIntake': self.water_intake,
-            'screenTime': self.screen_time,
-            'socialInteractions': self.social_interactions,
-            'deviceSource': self.device_source,
-            'timestamp': self.measurement_timestamp.isoformat(),
-            'createdAt': self.created_at.isoformat()
+                'duration': row.sleep_duration,
+                'qualityScore': row.sleep_quality_score,
+                'deepSleep': row.deep_sleep_duration,
+                'lightSleep': row.light_sleep_duration,
+                'remSleep': row.rem_sleep_duration
+            } if row.sleep_duration else None,
+            'stepsCount': row.steps_count,
+            'caloriesBurned': row.calories_burned,
+            'distanceTraveled': row.distance_traveled,
+            'activeMinutes': row.active_minutes,
+            'moodRating': row.mood_rating,
+            'waterIntake': row.water_intake,
+            'screenTime': row.screen_time,
+            'socialInteractions': row.social_interactions,
+            'deviceSource': row.device_source,
+            'timestamp': row.measurement_timestamp,
+            'createdAt': row.created_at
         }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
+
+# Built once at import; the route only binds parameters, so the compiled form is reused
+_CURRENT_HM_STMT = select(HealthMetric).where(
+    HealthMetric.user_id == bindparam('uid'),
+    HealthMetric.measurement_timestamp >= bindparam('cutoff')
+).order_by(HealthMetric.measurement_timestamp.desc()).limit(1)
 
 class AcademicData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -143,14 +289,40 @@ class AcademicData(db.Model):
     assignments_pending = db.Column(db.Integer, default=0)
     assignments_overdue = db.Column(db.Integer, default=0)
     average_assignment_score = db.Column(db.Float)
-    exam_scores = db.Column(db.Text)
-    courses_enrolled = db.Column(db.Text)
+    exam_scores = db.Column(db.JSON)
+    courses_enrolled = db.Column(db.JSON)
     target_gpa = db.Column(db.Float)
     academic_year = db.Column(db.String(20))
     semester = db.Column(db.String(20))
     recording_date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        db.Index('ix_ad_user_created', user_id, created_at.desc(), id.desc()),
+    )
+    
+    @classmethod
+    def latest_for_user(cls, user_id):
+        # Served by ix_ad_user_created as an index seek rather than a sort; created_at has
+        # one-second resolution, so id breaks ties between rows saved in the same second
+        return cls.query.filter_by(user_id=user_id).order_by(cls.created_at.desc(), cls.id.desc()).first()
+    
+    @classmethod
+    def latest_for_users(cls, user_ids):
+        # One windowed query for many users instead of one latest_for_user() call each
+        ranked = select(
+            cls.id,
+            func.row_number().over(
+                partition_by=cls.user_id,
+                order_by=(cls.created_at.desc(), cls.id.desc())
+            ).label('row_number')
+        ).where(cls.user_id.in_(user_ids)).subquery()
+        
+        rows = db.session.execute(
+            select(cls).join(ranked, ranked.c.id == cls.id).where(ranked.c.row_number == 1)
+        ).scalars()
+        return {row.user_id: row for row in rows}
     
     def to_dict(self):
         return {
@@ -170,8 +342,8 @@ class AcademicData(db.Model):
                 'overdue': self.assignments_overdue,
                 'averageScore': self.average_assignment_score
             },
-            'examScores': json.loads(self.exam_scores) if self.exam_scores else [],
-            'coursesEnrolled': json.loads(self.courses_enrolled) if self.courses_enrolled else [],
+            'examScores': self.exam_scores or [],
+            'coursesEnrolled': self.courses_enrolled or [],
             'goals': {
                 'targetGPA': self.target_gpa
             },
@@ -179,8 +351,8 @@ class AcademicData(db.Model):
                 'year': self.academic_year,
                 'semester': self.semester
             },
-            'recordingDate': self.recording_date.isoformat(),
-            'updatedAt': self.updated_at.isoformat()
+            'recordingDate': self.recording_date,
+            'updatedAt': self.updated_at
         }
 
 class Alert(db.Model):
@@ -197,28 +369,37 @@ class Alert(db.Model):
     source_metric = db.Column(db.String(100))
     threshold_value = db.Column(db.Float)
     actual_value = db.Column(db.Float)
-    recommended_actions = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    recommended_actions = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     
-    def to_dict(self):
+    __table_args__ = (
+        db.Index('ix_alert_user_resolved_created', user_id, is_resolved, created_at),
+        db.Index('ix_alert_user_created', user_id, created_at.desc()),
+    )
+    
+    @staticmethod
+    def row_to_dict(row):
         return {
-            'id': self.id,
-            'type': self.alert_type,
-            'category': self.category,
-            'title': self.title,
-            'message': self.message,
-            'priority': self.priority,
-            'isResolved': self.is_resolved,
-            'resolutionNotes': self.resolution_notes,
-            'resolvedAt': self.resolved_at.isoformat() if self.resolved_at else None,
-            'sourceMetric': self.source_metric,
-            'thresholdValue': self.threshold_value,
-            'actualValue': self.actual_value,
-            'recommendedActions': json.loads(self.recommended_actions) if self.recommended_actions else [],
-            'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat()
+            'id': row.id,
+            'type': row.alert_type,
+            'category': row.category,
+            'title': row.title,
+            'message': row.message,
+            'priority': row.priority,
+            'isResolved': row.is_resolved,
+            'resolutionNotes': row.resolution_notes,
+            'resolvedAt': row.resolved_at,
+            'sourceMetric': row.source_metric,
+            'thresholdValue': row.threshold_value,
+            'actualValue': row.actual_value,
+            'recommendedActions': row.recommended_actions or [],
+            'createdAt': row.created_at,
+            'updatedAt': row.updated_at
         }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
 
 class Device(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -231,36 +412,76 @@ class Device(db.Model):
     connection_status = db.Column(db.String(50), default='disconnected')
     last_sync_time = db.Column(db.DateTime)
     battery_level = db.Column(db.Integer)
-    supported_metrics = db.Column(db.Text)
-    device_settings = db.Column(db.Text)
-    registered_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    supported_metrics = db.Column(db.JSON)
+    device_settings = db.Column(db.JSON)
+    registered_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    last_updated = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     
-    def to_dict(self):
+    @staticmethod
+    def row_to_dict(row):
         return {
-            'id': self.id,
-            'name': self.device_name,
-            'type': self.device_type,
-            'model': self.device_model,
-            'status': self.connection_status,
-            'isConnected': self.is_connected,
-            'lastSync': self.last_sync_time.isoformat() if self.last_sync_time else None,
-            'battery': self.battery_level,
-            'supportedMetrics': json.loads(self.supported_metrics) if self.supported_metrics else [],
-            'registeredAt': self.registered_at.isoformat(),
-            'lastUpdated': self.last_updated.isoformat()
+            'id': row.id,
+            'name': row.device_name,
+            'type': row.device_type,
+            'model': row.device_model,
+            'status': row.connection_status,
+            'isConnected': row.is_connected,
+            'lastSync': row.last_sync_time,
+            'battery': row.battery_level,
+            'supportedMetrics': row.supported_metrics or [],
+            'registeredAt': row.registered_at,
+            'lastUpdated': row.last_updated
         }
+    
+    def to_dict(self):
+        return self.row_to_dict(self)
+
+# Exactly the columns Device.row_to_dict reads; device_id and the device_settings JSON are left out
+DEVICE_RESPONSE_COLUMNS = (
+    Device.id, Device.device_name, Device.device_type, Device.device_model,
+    Device.connection_status, Device.is_connected, Device.last_sync_time, Device.battery_level,
+    Device.supported_metrics, Device.registered_at, Device.last_updated
+)
 
 # =============================================================================
 # ML PREDICTION ENGINE
 # =============================================================================
 
 class MLPredictionEngine:
+    # Predictors are pure functions of a few aggregates, so results are memoized on those
+    # inputs; cached dicts are shared between callers and must be treated as read-only.
     def predict_burnout_risk(self, user_data):
-        stress_factor = user_data.get('avg_stress_level', 2) / 5.0
-        sleep_factor = max(0, (8 - user_data.get('avg_sleep_duration', 7)) / 8)
-        study_factor = min(1, user_data.get('daily_study_hours', 4) / 10)
-        gpa_factor = max(0, (4.0 - user_data.get('current_gpa', 3.5)) / 4.0)
+        return self._burnout_risk(
+            user_data.get('avg_stress_level', 2),
+            user_data.get('avg_sleep_duration', 7),
+            user_data.get('daily_study_hours', 4),
+            user_data.get('current_gpa', 3.5)
+        )
+    
+    def predict_academic_performance(self, user_data):
+        return self._academic_performance(
+            user_data.get('current_gpa', 3.0),
+            user_data.get('attendance_percentage', 90),
+            user_data.get('daily_study_hours', 4),
+            user_data.get('avg_sleep_quality', 80),
+            user_data.get('avg_stress_level', 2)
+        )
+    
+    def predict_health_trend(self, user_data):
+        return self._health_trend(
+            user_data.get('avg_heart_rate', 75),
+            user_data.get('avg_sleep_quality', 80),
+            user_data.get('avg_stress_level', 2),
+            user_data.get('avg_steps', 8000)
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _burnout_risk(stress_level, sleep_duration, study_hours, current_gpa):
+        stress_factor = stress_level / 5.0
+        sleep_factor = max(0, (8 - sleep_duration) / 8)
+        study_factor = min(1, study_hours / 10)
+        gpa_factor = max(0, (4.0 - current_gpa) / 4.0)
         
         risk_score = (stress_factor * 0.3 + sleep_factor * 0.3 + 
                      study_factor * 0.2 + gpa_factor * 0.2) * 100
@@ -268,7 +489,7 @@ class MLPredictionEngine:
         return {
             'risk_percentage': min(100, max(0, int(risk_score))),
             'confidence': 0.85,
-            'risk_level': self._get_risk_level(risk_score),
+            'risk_level': MLPredictionEngine._get_risk_level(risk_score),
             'factors': {
                 'stress_level': stress_factor,
                 'sleep_quality': sleep_factor,
@@ -277,12 +498,11 @@ class MLPredictionEngine:
             }
         }
     
-    def predict_academic_performance(self, user_data):
-        current_gpa = user_data.get('current_gpa', 3.0)
-        attendance = user_data.get('attendance_percentage', 90) / 100
-        study_hours = user_data.get('daily_study_hours', 4)
-        sleep_quality = user_data.get('avg_sleep_quality', 80) / 100
-        stress_level = user_data.get('avg_stress_level', 2)
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _academic_performance(current_gpa, attendance_percentage, study_hours, sleep_quality_score, stress_level):
+        attendance = attendance_percentage / 100
+        sleep_quality = sleep_quality_score / 100
         
         study_factor = min(1, study_hours / 6)
         health_factor = (sleep_quality * 0.6 + (1 - stress_level/5) * 0.4)
@@ -298,12 +518,9 @@ class MLPredictionEngine:
             'confidence': 0.82
         }
     
-    def predict_health_trend(self, user_data):
-        heart_rate = user_data.get('avg_heart_rate', 75)
-        sleep_quality = user_data.get('avg_sleep_quality', 80)
-        stress_level = user_data.get('avg_stress_level', 2)
-        activity_level = user_data.get('avg_steps', 8000)
-        
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _health_trend(heart_rate, sleep_quality, stress_level, activity_level):
         health_score = 0
         
         if 60 <= heart_rate <= 100:
@@ -327,42 +544,58 @@ class MLPredictionEngine:
             'confidence': 0.78
         }
     
+    def predict_health_trend_batch(self, features):
+        # Vectorized predict_health_trend; columns are (heart_rate, sleep_quality, stress_level, steps)
+        heart_rate, sleep_quality, stress_level, activity_level = np.asarray(features, dtype=float).reshape(-1, 4).T
+        
+        health_scores = (
+            np.where((heart_rate >= 60) & (heart_rate <= 100), 25, 0)
+            + np.where(sleep_quality >= 80, 30, np.where(sleep_quality >= 70, 20, 0))
+            + np.where(stress_level <= 2, 25, np.where(stress_level <= 3, 15, 0))
+            + np.where(activity_level >= 8000, 20, 0)
+        )
+        trends = np.where(health_scores >= 80, 'improving', np.where(health_scores >= 60, 'stable', 'declining'))
+        
+        return [{
+            'trend': trend,
+            'health_score': health_score,
+            'confidence': 0.78
+        } for trend, health_score in zip(trends.tolist(), health_scores.tolist())]
+    
     def generate_recommendations(self, user_data, predictions):
-        recommendations = []
+        recommendations = list(islice(self._iter_recommendations(user_data, predictions), 6))
         
+        return recommendations or [
+            "Maintain regular sleep schedule",
+            "Take breaks during study sessions",
+            "Stay physically active"
+        ]
+    
+    def _iter_recommendations(self, user_data, predictions):
         if predictions.get('burnout_risk', {}).get('risk_percentage', 0) > 60:
-            recommendations.extend([
-                "Consider reducing study hours and taking more breaks",
-                "Practice stress management techniques like meditation",
-                "Ensure you get 7-8 hours of quality sleep"
-            ])
+            yield "Consider reducing study hours and taking more breaks"
+            yield "Practice stress management techniques like meditation"
+            yield "Ensure you get 7-8 hours of quality sleep"
         
         sleep_duration = user_data.get('avg_sleep_duration', 7)
         if sleep_duration < 7:
-            recommendations.append("Increase sleep duration by 30-60 minutes")
+            yield "Increase sleep duration by 30-60 minutes"
         
         study_hours = user_data.get('daily_study_hours', 4)
         if study_hours > 8:
-            recommendations.append("Take study breaks every 90 minutes to improve focus")
+            yield "Take study breaks every 90 minutes to improve focus"
         
         steps = user_data.get('avg_steps', 8000)
         if steps < 8000:
-            recommendations.append("Increase daily physical activity to 8,000+ steps")
+            yield "Increase daily physical activity to 8,000+ steps"
         
         stress_level = user_data.get('avg_stress_level', 2)
         if stress_level >= 3:
-            recommendations.extend([
-                "Consider stress management techniques",
-                "Maintain regular exercise routine"
-            ])
-        
-        return recommendations[:6] if recommendations else [
-            "Maintain regular sleep schedule",
-            "Take breaks during study sessions",
-            "Stay physically active"
-        ]
+            yield "Consider stress management techniques"
+            yield "Maintain regular exercise routine"
     
-    def _get_risk_level(self, risk_score):
+    @staticmethod
+    def _get_risk_level(risk_score):
         if risk_score < 30:
             return "Low"
         elif risk_score < 60:
@@ -377,53 +610,209 @@ ml_engine = MLPredictionEngine()
 # UTILITY FUNCTIONS
 # =============================================================================
 
+# Successful password checks are remembered briefly so repeat logins skip the KDF.
+# Entries are keyed by an HMAC under a per-process random key, never the plaintext or a
+# plain digest that could be brute-forced offline; failures are not cached.
+PASSWORD_CHECK_TTL = 60
+PASSWORD_CHECK_CACHE_SIZE = 1024
+_PASSWORD_CACHE_KEY = secrets.token_bytes(32)
+_password_check_cache = {}
+_password_check_lock = threading.Lock()
+
+def verify_password(password_hash, password):
+    key = (password_hash, hmac.new(_PASSWORD_CACHE_KEY, password.encode('utf-8'), 'sha256').digest())
+    now = time.monotonic()
+    
+    with _password_check_lock:
+        expires_at = _password_check_cache.get(key)
+    if expires_at and expires_at > now:
+        return True
+    
+    if not check_password_hash(password_hash, password):
+        return False
+    
+    with _password_check_lock:
+        # A refreshed entry replaces itself; only a new one evicts the oldest when full
+        if _password_check_cache.pop(key, None) is None and len(_password_check_cache) >= PASSWORD_CHECK_CACHE_SIZE:
+            _password_check_cache.pop(next(iter(_password_check_cache)))
+        _password_check_cache[key] = now + PASSWORD_CHECK_TTL
+    return True
+
+# Users are cached per public_id in fixed time buckets, so a lookup is at most this stale
+USER_CACHE_TTL = 60
+
+@functools.lru_cache(maxsize=2048)
+def _load_user_by_public_id(public_id, time_bucket):
+    user = User.query.filter_by(public_id=public_id, is_active=True).first()
+    if user:
+        db.session.expunge(user)
+    return user
+
 def get_current_user():
     try:
         user_id = get_jwt_identity()
-        return User.query.filter_by(public_id=user_id, is_active=True).first()
+        user = _load_user_by_public_id(user_id, int(time.time() // USER_CACHE_TTL))
+        # Attach a copy of the cached row to this request's session without a SELECT
+        return db.session.merge(user, load=False) if user else None
     except:
         return None
 
-def calculate_health_status(health_data):
-    if not health_data:
-        return "No Data"
+def cache_get(key):
+    try:
+        return redis_client.get(key)
+    except redis.RedisError:
+        return None
+
+def cache_set(key, value, ttl):
+    try:
+        redis_client.setex(key, ttl, value)
+    except redis.RedisError:
+        pass
+
+def cache_delete(*keys):
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError:
+        pass
+
+def cache_incr(key):
+    try:
+        redis_client.incr(key)
+    except redis.RedisError:
+        pass
+
+def cached_json_response(key):
+    cached = cache_get(key)
+    return app.response_class(cached, mimetype=app.json.mimetype) if cached else None
+
+USER_PROFILE_CACHE_TTL = 900
+HEALTH_CACHE_TTL = 60
+PREDICTIONS_CACHE_TTL = 900
+
+def predictions_cache_key(user_id):
+    # Bumping the per-user data version orphans every cached prediction for that user
+    version = cache_get(f"pred:version:{user_id}")
+    return f"pred:{user_id}:{int(version or 0)}"
+
+def invalidate_predictions(user_id):
+    cache_incr(f"pred:version:{user_id}")
+
+def get_current_user_cached():
+    # Returns the user's to_dict() payload, shared across workers through Redis
+    try:
+        user_id = get_jwt_identity()
+    except:
+        return None
     
-    score = 100
+    key = f"user:{user_id}"
+    cached = cache_get(key)
+    if cached:
+        return app.json.loads(cached)
     
-    hr = health_data.get('heart_rate')
-    if hr:
-        if hr < 60 or hr > 100:
-            score -= 15
-        elif hr > 90:
-            score -= 5
+    user = get_current_user()
+    if not user:
+        return None
     
-    bp_sys = health_data.get('blood_pressure_systolic')
-    bp_dia = health_data.get('blood_pressure_diastolic')
-    if bp_sys and bp_dia:
-        if bp_sys > 140 or bp_dia > 90:
-            score -= 20
-        elif bp_sys > 130 or bp_dia > 80:
-            score -= 10
+    user_data = user.to_dict()
+    cache_user_profile(user_id, user_data)
+    return user_data
+
+def cache_user_profile(public_id, user_data):
+    cache_set(f"user:{public_id}", app.json.dumps_bytes(user_data), USER_PROFILE_CACHE_TTL)
+
+def get_current_user_id():
+    # Tokens carry the integer user id, so routes that only need the id skip the User query
+    try:
+        claims = get_jwt()
+        if 'uid_int' in claims:
+            return claims['uid_int'] if claims.get('is_active') else None
+    except:
+        return None
     
-    spo2 = health_data.get('oxygen_saturation')
-    if spo2 and spo2 < 95:
-        score -= 25
-    elif spo2 and spo2 < 98:
-        score -= 10
+    user = get_current_user()
+    return user.id if user else None
+
+def server_error(message, error):
+    # Every route's failure path: details go to the log only and clients get the fixed message;
+    # a failed database call also leaves the session needing a rollback
+    if isinstance(error, SQLAlchemyError):
+        db.session.rollback()
+    app.logger.error(message, exc_info=error)
+    return jsonify({'error': message}), 500
+
+RECENT_HEALTH_CACHE_TTL = 30
+RECENT_HEALTH_COLUMNS = (
+    HealthMetric.sleep_duration, HealthMetric.steps_count, HealthMetric.stress_level,
+    HealthMetric.calories_burned, HealthMetric.water_intake, HealthMetric.screen_time,
+    HealthMetric.social_interactions, HealthMetric.mood_rating, HealthMetric.active_minutes
+)
+
+def get_recent_health(user_id):
+    # Latest-metric fields shared through Redis by the goals and lifestyle routes, which the
+    # dashboard loads together; returns None when the user has no readings
+    cache_key = f"recent_health:{user_id}"
+    cached = cache_get(cache_key)
+    if cached:
+        return orjson.loads(cached)
+    
+    row = db.session.query(*RECENT_HEALTH_COLUMNS).filter(
+        HealthMetric.user_id == user_id
+    ).order_by(HealthMetric.measurement_timestamp.desc()).first()
+    recent = row._asdict() if row else None
+    cache_set(cache_key, orjson.dumps(recent), RECENT_HEALTH_CACHE_TTL)
+    return recent
+
+# (request key, column, cast) for the flat fields accepted by the submit endpoints
+HEALTH_FIELD_MAP = (
+    ('heartRate', 'heart_rate', int),
+    ('oxygenSaturation', 'oxygen_saturation', float),
+    ('stressLevel', 'stress_level', int),
+    ('sleepDuration', 'sleep_duration', float),
+    ('sleepQuality', 'sleep_quality_score', int),
+    ('stepsCount', 'steps_count', int),
+    ('caloriesBurned', 'calories_burned', int),
+    ('waterIntake', 'water_intake', int),
+    ('screenTime', 'screen_time', float),
+    ('moodRating', 'mood_rating', int),
+    ('socialInteractions', 'social_interactions', int),
+)
+
+ACADEMIC_FIELD_MAP = (
+    ('currentGPA', 'current_gpa', float),
+    ('dailyStudyHours', 'daily_study_hours', float),
+    ('weeklyStudyHours', 'weekly_study_hours', float),
+    ('attendancePercentage', 'attendance_percentage', float),
+    ('assignmentsCompleted', 'assignments_completed', int),
+    ('assignmentsPending', 'assignments_pending', int),
+    ('assignmentsOverdue', 'assignments_overdue', int),
+)
+
+def apply_fields(obj, data, field_map):
+    for json_key, column, cast in field_map:
+        value = data.get(json_key)
+        if value is not None:
+            setattr(obj, column, cast(value))
+
+def calculate_health_status(health_data):
+    if not health_data:
+        return "No Data"
     
-    sleep_quality = health_data.get('sleep_quality_score')
-    if sleep_quality:
-        if sleep_quality < 60:
-            score -= 20
-        elif sleep_quality < 80:
-            score -= 10
+    # Missing readings count as 0 and each penalty is gated on its reading being present;
+    # within a metric the harsher band wins via max() instead of an if/elif chain.
+    hr = health_data.get('heart_rate') or 0
+    bp_sys = health_data.get('blood_pressure_systolic') or 0
+    bp_dia = health_data.get('blood_pressure_diastolic') or 0
+    spo2 = health_data.get('oxygen_saturation') or 0
+    sleep_quality = health_data.get('sleep_quality_score') or 0
+    stress = health_data.get('stress_level') or 0
     
-    stress = health_data.get('stress_level')
-    if stress:
-        if stress >= 4:
-            score -= 15
-        elif stress >= 3:
-            score -= 8
+    score = 100 - (
+        bool(hr) * max(15 * ((hr < 60) | (hr > 100)), 5 * (hr > 90))
+        + (bool(bp_sys) & bool(bp_dia)) * max(20 * ((bp_sys > 140) | (bp_dia > 90)), 10 * ((bp_sys > 130) | (bp_dia > 80)))
+        + bool(spo2) * max(25 * (spo2 < 95), 10 * (spo2 < 98))
+        + bool(sleep_quality) * max(20 * (sleep_quality < 60), 10 * (sleep_quality < 80))
+        + bool(stress) * max(15 * (stress >= 4), 8 * (stress >= 3))
+    )
     
     if score >= 90:
         return "Excellent"
@@ -438,36 +827,58 @@ def get_user_aggregated_data(user_id, days=30):
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    health_metrics = HealthMetric.query.filter(
+    # Zero readings are excluded from the averages, hence NULLIF(column, 0)
+    health_stats = select(
+        func.count(HealthMetric.id).label('count'),
+        func.avg(func.nullif(HealthMetric.heart_rate, 0)).label('hr'),
+        func.avg(func.nullif(HealthMetric.sleep_duration, 0)).label('sleep'),
+        func.avg(func.nullif(HealthMetric.sleep_quality_score, 0)).label('quality'),
+        func.avg(func.nullif(HealthMetric.stress_level, 0)).label('stress'),
+        func.avg(func.nullif(HealthMetric.steps_count, 0)).label('steps')
+    ).where(
         HealthMetric.user_id == user_id,
         HealthMetric.measurement_timestamp >= start_date
-    ).all()
+    ).subquery()
+    
+    latest_academic_id = select(AcademicData.id).where(
+        AcademicData.user_id == user_id
+    ).order_by(AcademicData.created_at.desc(), AcademicData.id.desc()).limit(1).scalar_subquery()
     
-    academic_data = AcademicData.query.filter_by(user_id=user_id).order_by(
-        AcademicData.created_at.desc()
-    ).first()
+    # The aggregate always yields exactly one row; the latest academic record is joined onto it
+    # so the predictors' inputs arrive in a single round-trip
+    row = db.session.execute(
+        select(
+            health_stats,
+            AcademicData.id.label('academic_id'),
+            AcademicData.current_gpa,
+            AcademicData.daily_study_hours,
+            AcademicData.attendance_percentage,
+            AcademicData.assignments_pending,
+            AcademicData.assignments_completed
+        ).select_from(health_stats).outerjoin(AcademicData, AcademicData.id == latest_academic_id)
+    ).one()
     
-    if not health_metrics and not academic_data:
+    if not row.count and row.academic_id is None:
         return get_default_user_data()
     
     health_data = {}
-    if health_metrics:
+    if row.count:
         health_data = {
-            'avg_heart_rate': sum(h.heart_rate for h in health_metrics if h.heart_rate) / len([h for h in health_metrics if h.heart_rate]) if any(h.heart_rate for h in health_metrics) else 75,
-            'avg_sleep_duration': sum(h.sleep_duration for h in health_metrics if h.sleep_duration) / len([h for h in health_metrics if h.sleep_duration]) if any(h.sleep_duration for h in health_metrics) else 7,
-            'avg_sleep_quality': sum(h.sleep_quality_score for h in health_metrics if h.sleep_quality_score) / len([h for h in health_metrics if h.sleep_quality_score]) if any(h.sleep_quality_score for h in health_metrics) else 80,
-            'avg_stress_level': sum(h.stress_level for h in health_metrics if h.stress_level) / len([h for h in health_metrics if h.stress_level]) if any(h.stress_level for h in health_metrics) else 2,
-            'avg_steps': sum(h.steps_count for h in health_metrics if h.steps_count) / len([h for h in health_metrics if h.steps_count]) if any(h.steps_count for h in health_metrics) else 8000,
+            'avg_heart_rate': row.hr if row.hr is not None else 75,
+            'avg_sleep_duration': row.sleep if row.sleep is not None else 7,
+            'avg_sleep_quality': row.quality if row.quality is not None else 80,
+            'avg_stress_level': row.stress if row.stress is not None else 2,
+            'avg_steps': row.steps if row.steps is not None else 8000,
         }
     
     academic_info = {}
-    if academic_data:
+    if row.academic_id is not None:
         academic_info = {
-            'current_gpa': academic_data.current_gpa or 3.0,
-            'daily_study_hours': academic_data.daily_study_hours or 4.0,
-            'attendance_percentage': academic_data.attendance_percentage or 90.0,
-            'assignments_pending': academic_data.assignments_pending or 2,
-            'assignments_completed': academic_data.assignments_completed or 10
+            'current_gpa': row.current_gpa or 3.0,
+            'daily_study_hours': row.daily_study_hours or 4.0,
+            'attendance_percentage': row.attendance_percentage or 90.0,
+            'assignments_pending': row.assignments_pending or 2,
+            'assignments_completed': row.assignments_completed or 10
         }
     
     return {**health_data, **academic_info}
@@ -487,50 +898,57 @@ def get_default_user_data():
     }
 
 def create_sample_data(user_id):
-    # Create sample health metrics for the past 7 days
-    for i in range(7):
-        date = datetime.utcnow() - timedelta(days=i)
-        
-        health_metric = HealthMetric(
-            user_id=user_id,
-            heart_rate=random.randint(65, 95),
-            blood_pressure_systolic=random.randint(110, 130),
-            blood_pressure_diastolic=random.randint(70, 85),
-            oxygen_saturation=random.randint(96, 100),
-            stress_level=random.randint(1, 3),
-            sleep_duration=random.uniform(6.5, 8.5),
-            sleep_quality_score=random.randint(70, 95),
-            deep_sleep_duration=random.uniform(1.5, 2.5),
-            light_sleep_duration=random.uniform(3.5, 4.5),
-            rem_sleep_duration=random.uniform(1.0, 1.5),
-            steps_count=random.randint(6000, 12000),
-            calories_burned=random.randint(1800, 2500),
-            active_minutes=random.randint(30, 90),
-            mood_rating=random.randint(6, 9),
-            water_intake=random.randint(4, 8),
-            screen_time=random.uniform(3.0, 6.0),
-            social_interactions=random.randint(3, 10),
-            measurement_timestamp=date
-        )
-        db.session.add(health_metric)
+    # Sample rows are written with one multi-row INSERT per table
+    now = datetime.utcnow()
+    
+    # Create sample health metrics for the past 7 days, drawing each column in one batch
+    days = 7
+    rng = np.random.default_rng()
+    sample_columns = {
+        'heart_rate': rng.integers(65, 96, days),
+        'blood_pressure_systolic': rng.integers(110, 131, days),
+        'blood_pressure_diastolic': rng.integers(70, 86, days),
+        'oxygen_saturation': rng.integers(96, 101, days),
+        'stress_level': rng.integers(1, 4, days),
+        'sleep_duration': rng.uniform(6.5, 8.5, days),
+        'sleep_quality_score': rng.integers(70, 96, days),
+        'deep_sleep_duration': rng.uniform(1.5, 2.5, days),
+        'light_sleep_duration': rng.uniform(3.5, 4.5, days),
+        'rem_sleep_duration': rng.uniform(1.0, 1.5, days),
+        'steps_count': rng.integers(6000, 12001, days),
+        'calories_burned': rng.integers(1800, 2501, days),
+        'active_minutes': rng.integers(30, 91, days),
+        'mood_rating': rng.integers(6, 10, days),
+        'water_intake': rng.integers(4, 9, days),
+        'screen_time': rng.uniform(3.0, 6.0, days),
+        'social_interactions': rng.integers(3, 11, days)
+    }
+    
+    health_rows = [
+        {'user_id': user_id, 'measurement_timestamp': now - timedelta(days=i)}
+        for i in range(days)
+    ]
+    for column, values in sample_columns.items():
+        for row, value in zip(health_rows, values.tolist()):
+            row[column] = value
+    db.session.execute(HealthMetric.__table__.insert(), health_rows)
     
     # Create sample academic data
-    academic_data = AcademicData(
-        user_id=user_id,
-        current_gpa=random.uniform(3.0, 3.8),
-        semester_gpa=random.uniform(3.2, 3.9),
-        daily_study_hours=random.uniform(3.0, 6.0),
-        weekly_study_hours=random.uniform(20.0, 35.0),
-        attendance_percentage=random.uniform(85.0, 98.0),
-        assignments_completed=random.randint(8, 15),
-        assignments_pending=random.randint(2, 5),
-        assignments_overdue=random.randint(0, 2),
-        average_assignment_score=random.uniform(75.0, 95.0),
-        target_gpa=3.8,
-        academic_year="2024-2025",
-        semester="Fall 2024"
-    )
-    db.session.add(academic_data)
+    db.session.execute(AcademicData.__table__.insert(), [{
+        'user_id': user_id,
+        'current_gpa': random.uniform(3.0, 3.8),
+        'semester_gpa': random.uniform(3.2, 3.9),
+        'daily_study_hours': random.uniform(3.0, 6.0),
+        'weekly_study_hours': random.uniform(20.0, 35.0),
+        'attendance_percentage': random.uniform(85.0, 98.0),
+        'assignments_completed': random.randint(8, 15),
+        'assignments_pending': random.randint(2, 5),
+        'assignments_overdue': random.randint(0, 2),
+        'average_assignment_score': random.uniform(75.0, 95.0),
+        'target_gpa': 3.8,
+        'academic_year': "2024-2025",
+        'semester': "Fall 2024"
+    }])
     
     # Create sample alerts
     sample_alerts = [
@@ -560,18 +978,16 @@ def create_sample_data(user_id):
         }
     ]
     
-    for alert_data in sample_alerts:
-        alert = Alert(
-            user_id=user_id,
-            alert_type=alert_data['type'],
-            category=alert_data['category'],
-            title=alert_data['title'],
-            message=alert_data['message'],
-            priority=alert_data['priority'],
-            source_metric=alert_data['source_metric'],
-            is_resolved=alert_data.get('resolved', False)
-        )
-        db.session.add(alert)
+    db.session.execute(Alert.__table__.insert(), [{
+        'user_id': user_id,
+        'alert_type': alert_data['type'],
+        'category': alert_data['category'],
+        'title': alert_data['title'],
+        'message': alert_data['message'],
+        'priority': alert_data['priority'],
+        'source_metric': alert_data['source_metric'],
+        'is_resolved': alert_data.get('resolved', False)
+    } for alert_data in sample_alerts])
     
     # Create sample devices
     devices = [
@@ -598,19 +1014,17 @@ def create_sample_data(user_id):
         }
     ]
     
-    for device_data in devices:
-        device = Device(
-            user_id=user_id,
-            device_name=device_data['name'],
-            device_type=device_data['type'],
-            device_model=device_data['model'],
-            device_id=f"{device_data['type']}_{uuid.uuid4().hex[:8]}",
-            connection_status=device_data['status'],
-            is_connected=device_data['status'] == 'connected',
-            battery_level=device_data['battery'],
-            last_sync_time=datetime.utcnow() if device_data['status'] == 'connected' else None
-        )
-        db.session.add(device)
+    db.session.execute(Device.__table__.insert(), [{
+        'user_id': user_id,
+        'device_name': device_data['name'],
+        'device_type': device_data['type'],
+        'device_model': device_data['model'],
+        'device_id': f"{device_data['type']}_{secrets.token_hex(4)}",
+        'connection_status': device_data['status'],
+        'is_connected': device_data['status'] == 'connected',
+        'battery_level': device_data['battery'],
+        'last_sync_time': now if device_data['status'] == 'connected' else None
+    } for device_data in devices])
     
     db.session.commit()
 
@@ -650,7 +1064,8 @@ def register():
         
         user.set_password(data['password'])
         db.session.add(user)
-        db.session.commit()
+        # Flush for the user id only; create_sample_data commits user and samples together
+        db.session.flush()
         
         create_sample_data(user.id)
         
@@ -661,8 +1076,7 @@ def register():
         }), 201
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Registration failed: {str(e)}'}), 500
+        return server_error('Registration failed', e)
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -682,79 +1096,90 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        access_token = create_access_token(identity=user.public_id)
+        # Move hashes made with older parameters onto the configured work factor
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        
+        access_token = create_access_token(
+            identity=user.public_id,
+            additional_claims={'is_active': user.is_active, 'uid_int': user.id}
+        )
+        
+        # The row is already loaded, so warm the profile cache for follow-up requests
+        user_data = user.to_dict()
+        cache_user_profile(user.public_id, user_data)
         
         return jsonify({
             'success': True,
             'message': 'Login successful',
-            'user': user.to_dict(),
+            'user': user_data,
             'token': access_token
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Login failed: {str(e)}'}), 500
+        return server_error('Login failed', e)
 
 @app.route('/api/auth/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     try:
-        user = get_current_user()
+        user = get_current_user_cached()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         return jsonify({
             'success': True,
-            'user': user.to_dict()
+            'user': user
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch profile: {str(e)}'}), 500
+        return server_error('Failed to fetch profile', e)
 
 # Health Data Routes
 @app.route('/api/health/current', methods=['GET'])
 @jwt_required()
 def get_current_health():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
+        cache_key = f"health:current:{user_id}"
+        cached = cached_json_response(cache_key)
+        if cached:
+            return cached, 200
+        
         twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
         
-        latest_metric = HealthMetric.query.filter(
-            HealthMetric.user_id == user.id,
-            HealthMetric.measurement_timestamp >= twenty_four_hours_ago
-        ).order_by(HealthMetric.measurement_timestamp.desc()).first()
+        latest_metric = db.session.execute(
+            _CURRENT_HM_STMT, {'uid': user_id, 'cutoff': twenty_four_hours_ago}
+        ).scalar_one_or_none()
         
         if not latest_metric:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'heartRate': 78,
-                    'bloodPressure': {'systolic': 118, 'diastolic': 76},
-                    'oxygenSaturation': 98,
-                    'stressLevel': 'Low',
-                    'sleepQuality': 85,
-                    'healthStatus': 'Excellent',
-                    'stepsCount': 8247,
-                    'caloriesBurned': 2156,
-                    'activeMinutes': 45,
-                    'lastUpdated': datetime.utcnow().isoformat()
-                }
-            }), 200
-        
-        health_status = calculate_health_status({
-            'heart_rate': latest_metric.heart_rate,
-            'blood_pressure_systolic': latest_metric.blood_pressure_systolic,
-            'blood_pressure_diastolic': latest_metric.blood_pressure_diastolic,
-            'oxygen_saturation': latest_metric.oxygen_saturation,
-            'sleep_quality_score': latest_metric.sleep_quality_score,
-            'stress_level': latest_metric.stress_level
-        })
-        
-        return jsonify({
-            'success': True,
-            'data': {
+            health_data = {
+                'heartRate': 78,
+                'bloodPressure': {'systolic': 118, 'diastolic': 76},
+                'oxygenSaturation': 98,
+                'stressLevel': 'Low',
+                'sleepQuality': 85,
+                'healthStatus': 'Excellent',
+                'stepsCount': 8247,
+                'caloriesBurned': 2156,
+                'activeMinutes': 45,
+                'lastUpdated': datetime.utcnow()
+            }
+        else:
+            health_status = calculate_health_status({
+                'heart_rate': latest_metric.heart_rate,
+                'blood_pressure_systolic': latest_metric.blood_pressure_systolic,
+                'blood_pressure_diastolic': latest_metric.blood_pressure_diastolic,
+                'oxygen_saturation': latest_metric.oxygen_saturation,
+                'sleep_quality_score': latest_metric.sleep_quality_score,
+                'stress_level': latest_metric.stress_level
+            })
+            
+            health_data = {
                 'heartRate': latest_metric.heart_rate,
                 'bloodPressure': {
                     'systolic': latest_metric.blood_pressure_systolic,
@@ -767,40 +1192,53 @@ def get_current_health():
                 'stepsCount': latest_metric.steps_count,
                 'caloriesBurned': latest_metric.calories_burned,
                 'activeMinutes': latest_metric.active_minutes,
-                'lastUpdated': latest_metric.measurement_timestamp.isoformat()
+                'lastUpdated': latest_metric.measurement_timestamp
             }
-        }), 200
+        
+        response_data = {
+            'success': True,
+            'data': health_data
+        }
+        cache_set(cache_key, app.json.dumps_bytes(response_data), HEALTH_CACHE_TTL)
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch health data: {str(e)}'}), 500
+        return server_error('Failed to fetch health data', e)
 
 @app.route('/api/health/history', methods=['GET'])
 @jwt_required()
 def get_health_history():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
         days = int(request.args.get('days', 7))
         metric_type = request.args.get('metric', 'all')
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        cursor = request.args.get('cursor', type=int)
         
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        health_data = HealthMetric.query.filter(
-            HealthMetric.user_id == user.id,
-            HealthMetric.measurement_timestamp >= start_date
-        ).order_by(HealthMetric.measurement_timestamp.asc()).all()
-        
         if metric_type == 'heart_rate':
+            health_data = HealthMetric.history_rows(
+                user_id, start_date, HealthMetric.heart_rate, before=cursor, limit=limit
+            )
             data = [{
                 'date': h.measurement_timestamp.strftime('%Y-%m-%d'),
                 'time': h.measurement_timestamp.strftime('%H:%M'),
                 'value': h.heart_rate,
-                'timestamp': h.measurement_timestamp.isoformat()
-            } for h in health_data if h.heart_rate]
+                'timestamp': h.measurement_timestamp
+            } for h in health_data]
         
         elif metric_type == 'sleep':
+            health_data = HealthMetric.history_rows(
+                user_id, start_date, HealthMetric.sleep_duration,
+                HealthMetric.deep_sleep_duration, HealthMetric.light_sleep_duration,
+                HealthMetric.rem_sleep_duration, HealthMetric.sleep_quality_score,
+                before=cursor, limit=limit
+            )
             data = [{
                 'date': h.measurement_timestamp.strftime('%Y-%m-%d'),
                 'totalSleep': h.sleep_duration,
@@ -808,34 +1246,45 @@ def get_health_history():
                 'lightSleep': h.light_sleep_duration,
                 'remSleep': h.rem_sleep_duration,
                 'quality': h.sleep_quality_score
-            } for h in health_data if h.sleep_duration]
+            } for h in health_data]
         
         elif metric_type == 'stress':
+            health_data = HealthMetric.history_rows(
+                user_id, start_date, HealthMetric.stress_level, before=cursor, limit=limit
+            )
             data = [{
                 'date': h.measurement_timestamp.strftime('%Y-%m-%d'),
                 'level': h.stress_level,
-                'timestamp': h.measurement_timestamp.isoformat()
-            } for h in health_data if h.stress_level]
+                'timestamp': h.measurement_timestamp
+            } for h in health_data]
         
         else:
-            data = [h.to_dict() for h in health_data]
+            health_data = HealthMetric.dicts_for_user(user_id, start_date, before=cursor, limit=limit)
+            data = health_data
+        
+        # Pages run newest to oldest; the oldest row on this page is where the next one starts
+        next_cursor = None
+        if len(health_data) == limit:
+            oldest = health_data[0]
+            next_cursor = oldest['id'] if isinstance(oldest, dict) else oldest.id
         
         return jsonify({
             'success': True,
             'data': data,
             'count': len(data),
+            'nextCursor': next_cursor,
             'period': {'days': days, 'metric': metric_type}
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch health history: {str(e)}'}), 500
+        return server_error('Failed to fetch health history', e)
 
 @app.route('/api/health/submit', methods=['POST'])
 @jwt_required()
 def submit_health_data():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
@@ -843,40 +1292,22 @@ def submit_health_data():
             return jsonify({'error': 'No data provided'}), 400
         
         health_metric = HealthMetric(
-            user_id=user.id,
+            user_id=user_id,
             measurement_timestamp=datetime.utcnow()
         )
         
-        # Update fields from data
-        if 'heartRate' in data:
-            health_metric.heart_rate = int(data['heartRate'])
-        if 'bloodPressure' in data:
-            bp = data['bloodPressure']
-            health_metric.blood_pressure_systolic = int(bp.get('systolic', 0)) if bp.get('systolic') else None
-            health_metric.blood_pressure_diastolic = int(bp.get('diastolic', 0)) if bp.get('diastolic') else None
-        if 'oxygenSaturation' in data:
-            health_metric.oxygen_saturation = float(data['oxygenSaturation'])
-        if 'stressLevel' in data:
-            health_metric.stress_level = int(data['stressLevel'])
-        if 'sleepDuration' in data:
-            health_metric.sleep_duration = float(data['sleepDuration'])
-        if 'sleepQuality' in data:
-            health_metric.sleep_quality_score = int(data['sleepQuality'])
-        if 'stepsCount' in data:
-            health_metric.steps_count = int(data['stepsCount'])
-        if 'caloriesBurned' in data:
-            health_metric.calories_burned = int(data['caloriesBurned'])
-        if 'waterIntake' in data:
-            health_metric.water_intake = int(data['waterIntake'])
-        if 'screenTime' in data:
-            health_metric.screen_time = float(data['screenTime'])
-        if 'moodRating' in data:
-            health_metric.mood_rating = int(data['moodRating'])
-        if 'socialInteractions' in data:
-            health_metric.social_interactions = int(data['socialInteractions'])
+        apply_fields(health_metric, data, HEALTH_FIELD_MAP)
+        bp = data.get('bloodPressure')
+        if bp is not None:
+            health_metric.blood_pressure_systolic = int(bp['systolic']) if bp.get('systolic') else None
+            health_metric.blood_pressure_diastolic = int(bp['diastolic']) if bp.get('diastolic') else None
         
         db.session.add(health_metric)
         db.session.commit()
+        cache_delete(
+            f"health:current:{user_id}", f"lifestyle:{user_id}", f"goals:{user_id}", f"recent_health:{user_id}"
+        )
+        invalidate_predictions(user_id)
         
         return jsonify({
             'success': True,
@@ -885,21 +1316,18 @@ def submit_health_data():
         }), 201
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Failed to save health data: {str(e)}'}), 500
+        return server_error('Failed to save health data', e)
 
 # Academic Data Routes
 @app.route('/api/academic/performance', methods=['GET'])
 @jwt_required()
 def get_academic_performance():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        academic_data = AcademicData.query.filter_by(user_id=user.id).order_by(
-            AcademicData.created_at.desc()
-        ).first()
+        academic_data = AcademicData.latest_for_user(user_id)
         
         if not academic_data:
             return jsonify({
@@ -923,44 +1351,30 @@ def get_academic_performance():
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch academic data: {str(e)}'}), 500
+        return server_error('Failed to fetch academic data', e)
 
 @app.route('/api/academic/submit', methods=['POST'])
 @jwt_required()
 def submit_academic_data():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        academic_data = AcademicData.query.filter_by(user_id=user.id).first()
+        academic_data = AcademicData.query.filter_by(user_id=user_id).first()
         if not academic_data:
-            academic_data = AcademicData(user_id=user.id)
-        
-        if 'currentGPA' in data:
-            academic_data.current_gpa = float(data['currentGPA'])
-        if 'dailyStudyHours' in data:
-            academic_data.daily_study_hours = float(data['dailyStudyHours'])
-        if 'weeklyStudyHours' in data:
-            academic_data.weekly_study_hours = float(data['weeklyStudyHours'])
-        if 'attendancePercentage' in data:
-            academic_data.attendance_percentage = float(data['attendancePercentage'])
-        if 'assignmentsCompleted' in data:
-            academic_data.assignments_completed = int(data['assignmentsCompleted'])
-        if 'assignmentsPending' in data:
-            academic_data.assignments_pending = int(data['assignmentsPending'])
-        if 'assignmentsOverdue' in data:
-            academic_data.assignments_overdue = int(data['assignmentsOverdue'])
-        
-        academic_data.updated_at = datetime.utcnow()
+            academic_data = AcademicData(user_id=user_id)
+        
+        apply_fields(academic_data, data, ACADEMIC_FIELD_MAP)
         
         if academic_data.id is None:
             db.session.add(academic_data)
         db.session.commit()
+        invalidate_predictions(user_id)
         
         return jsonify({
             'success': True,
@@ -968,19 +1382,23 @@ def submit_academic_data():
         }), 200
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Failed to save academic data: {str(e)}'}), 500
+        return server_error('Failed to save academic data', e)
 
 # ML Predictions Routes
 @app.route('/api/predictions', methods=['GET'])
 @jwt_required()
 def get_predictions():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        user_data = get_user_aggregated_data(user.id)
+        cache_key = predictions_cache_key(user_id)
+        cached = cached_json_response(cache_key)
+        if cached:
+            return cached, 200
+        
+        user_data = get_user_aggregated_data(user_id)
         
         burnout_risk = ml_engine.predict_burnout_risk(user_data)
         academic_performance = ml_engine.predict_academic_performance(user_data)
@@ -994,7 +1412,7 @@ def get_predictions():
         
         recommendations = ml_engine.generate_recommendations(user_data, predictions)
         
-        return jsonify({
+        response_data = {
             'success': True,
             'predictions': {
                 'burnoutRisk': burnout_risk,
@@ -1002,55 +1420,67 @@ def get_predictions():
                 'healthTrend': health_trend
             },
             'recommendations': recommendations,
-            'generatedAt': datetime.utcnow().isoformat()
-        }), 200
+            'generatedAt': datetime.utcnow()
+        }
+        cache_set(cache_key, app.json.dumps_bytes(response_data), PREDICTIONS_CACHE_TTL)
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to generate predictions: {str(e)}'}), 500
+        return server_error('Failed to generate predictions', e)
 
 # Alerts Routes
 @app.route('/api/alerts', methods=['GET'])
 @jwt_required()
 def get_alerts():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
         show_resolved = request.args.get('resolved', 'false').lower() == 'true'
-        limit = int(request.args.get('limit', 50))
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        cursor = request.args.get('cursor', type=int)
         
-        query = Alert.query.filter(Alert.user_id == user.id)
+        query = db.session.query(*response_columns(Alert)).filter(Alert.user_id == user_id)
         
         if not show_resolved:
             query = query.filter(Alert.is_resolved == False)
         
-        alerts = query.order_by(Alert.created_at.desc()).limit(limit).all()
+        if cursor:
+            # Cursor is the id of the last alert already returned; created_at ties fall back to id
+            cursor_created_at = select(Alert.created_at).where(Alert.id == cursor).scalar_subquery()
+            query = query.filter(or_(
+                Alert.created_at < cursor_created_at,
+                and_(Alert.created_at == cursor_created_at, Alert.id < cursor)
+            ))
+        
+        alerts = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit).all()
         
         return jsonify({
             'success': True,
-            'alerts': [alert.to_dict() for alert in alerts],
-            'count': len(alerts)
+            'alerts': [Alert.row_to_dict(alert) for alert in alerts],
+            'count': len(alerts),
+            'nextCursor': alerts[-1].id if len(alerts) == limit else None
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch alerts: {str(e)}'}), 500
+        return server_error('Failed to fetch alerts', e)
 
 @app.route('/api/alerts/<int:alert_id>/resolve', methods=['PUT'])
 @jwt_required()
 def resolve_alert(alert_id):
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        alert = Alert.query.filter_by(id=alert_id, user_id=user.id).first()
+        alert = Alert.query.filter_by(id=alert_id, user_id=user_id).first()
         if not alert:
             return jsonify({'error': 'Alert not found'}), 404
         
         alert.is_resolved = True
         alert.resolved_at = datetime.utcnow()
-        alert.updated_at = datetime.utcnow()
         
         db.session.commit()
         
@@ -1060,126 +1490,132 @@ def resolve_alert(alert_id):
         }), 200
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Failed to resolve alert: {str(e)}'}), 500
+        return server_error('Failed to resolve alert', e)
 
 # Device Routes
 @app.route('/api/devices', methods=['GET'])
 @jwt_required()
 def get_devices():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        devices = Device.query.filter_by(user_id=user.id).all()
+        devices = db.session.query(*DEVICE_RESPONSE_COLUMNS).filter(Device.user_id == user_id).all()
         
         return jsonify({
             'success': True,
-            'devices': [device.to_dict() for device in devices]
+            'devices': [Device.row_to_dict(device) for device in devices]
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch devices: {str(e)}'}), 500
+        return server_error('Failed to fetch devices', e)
 
 # Goals and Progress Routes
 @app.route('/api/goals', methods=['GET'])
 @jwt_required()
 def get_goals():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        recent_health = HealthMetric.query.filter_by(user_id=user.id).order_by(
-            HealthMetric.measurement_timestamp.desc()
-        ).first()
+        cache_key = f"goals:{user_id}"
+        cached = cached_json_response(cache_key)
+        if cached:
+            return cached, 200
+        
+        recent_health = get_recent_health(user_id)
         
+        sleep = recent_health['sleep_duration'] if recent_health and recent_health['sleep_duration'] else 7.2
+        steps = recent_health['steps_count'] if recent_health else 8247
+        study = 4.5
+        stress = recent_health['stress_level'] if recent_health else 1
+        
+        # Lower stress is better, so its progress counts down from the target
         goals = {
-            'sleep': {
-                'target': 8.0,
-                'current': recent_health.sleep_duration if recent_health and recent_health.sleep_duration else 7.2,
-                'progress': 90
-            },
-            'steps': {
-                'target': 10000,
-                'current': recent_health.steps_count if recent_health else 8247,
-                'progress': 82
-            },
-            'study': {
-                'target': 6.0,
-                'current': 4.5,
-                'progress': 75
-            },
-            'stress': {
-                'target': 2,
-                'current': recent_health.stress_level if recent_health else 1,
-                'progress': 100
-            }
+            'sleep': {'target': 8.0, 'current': sleep, 'progress': round(min(100, sleep / 8.0 * 100))},
+            'steps': {'target': 10000, 'current': steps, 'progress': round(min(100, steps / 10000 * 100))},
+            'study': {'target': 6.0, 'current': study, 'progress': round(min(100, study / 6.0 * 100))},
+            'stress': {'target': 2, 'current': stress, 'progress': round(max(0, (2 - stress + 1) / 2 * 100))}
         }
         
-        for goal_name, goal_data in goals.items():
-            if goal_name == 'stress':
-                progress = max(0, (goal_data['target'] - goal_data['current'] + 1) / goal_data['target'] * 100)
-            else:
-                progress = min(100, goal_data['current'] / goal_data['target'] * 100)
-            goals[goal_name]['progress'] = round(progress)
-        
-        return jsonify({
+        response_data = {
             'success': True,
             'goals': goals
-        }), 200
+        }
+        cache_set(cache_key, app.json.dumps_bytes(response_data), HEALTH_CACHE_TTL)
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch goals: {str(e)}'}), 500
+        return server_error('Failed to fetch goals', e)
 
 # Lifestyle data route
 @app.route('/api/lifestyle', methods=['GET'])
 @jwt_required()
 def get_lifestyle_data():
     try:
-        user = get_current_user()
-        if not user:
+        user_id = get_current_user_id()
+        if not user_id:
             return jsonify({'error': 'User not found'}), 404
         
-        recent_health = HealthMetric.query.filter_by(user_id=user.id).order_by(
-            HealthMetric.measurement_timestamp.desc()
-        ).first()
+        cache_key = f"lifestyle:{user_id}"
+        cached = cached_json_response(cache_key)
+        if cached:
+            return cached, 200
+        
+        recent_health = get_recent_health(user_id)
         
         lifestyle_data = {
-            'dailySteps': recent_health.steps_count if recent_health else 8247,
-            'caloriesBurned': recent_health.calories_burned if recent_health else 2156,
-            'waterIntake': recent_health.water_intake if recent_health else 6,
-            'screenTime': recent_health.screen_time if recent_health else 5.2,
-            'socialInteractions': recent_health.social_interactions if recent_health else 7,
-            'moodRating': recent_health.mood_rating if recent_health else 7,
-            'activeMinutes': recent_health.active_minutes if recent_health else 45
+            'dailySteps': recent_health['steps_count'] if recent_health else 8247,
+            'caloriesBurned': recent_health['calories_burned'] if recent_health else 2156,
+            'waterIntake': recent_health['water_intake'] if recent_health else 6,
+            'screenTime': recent_health['screen_time'] if recent_health else 5.2,
+            'socialInteractions': recent_health['social_interactions'] if recent_health else 7,
+            'moodRating': recent_health['mood_rating'] if recent_health else 7,
+            'activeMinutes': recent_health['active_minutes'] if recent_health else 45
         }
         
-        return jsonify({
+        response_data = {
             'success': True,
             'data': lifestyle_data
-        }), 200
+        }
+        cache_set(cache_key, app.json.dumps_bytes(response_data), HEALTH_CACHE_TTL)
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch lifestyle data: {str(e)}'}), 500
+        return server_error('Failed to fetch lifestyle data', e)
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
+    pool = db.engine.pool
     return jsonify({
         'status': 'healthy',
         'service': 'digital-twin-backend',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow(),
+        'dbPool': {
+            'size': pool.size(),
+            'checkedOut': pool.checkedout(),
+            'overflow': max(0, pool.overflow())
+        }
     }), 200
 
 # Serve frontend files
+@functools.lru_cache(maxsize=None)
+def load_index_html():
+    # Read once per process; restart the server to pick up frontend changes
+    with open('index.html', 'rb') as f:
+        return f.read()
+
 @app.route('/')
 def serve_frontend():
     # Serve the index.html file from your frontend
-    with open('index.html', 'r') as f:
-        content = f.read()
-    return content
+    response = app.response_class(load_index_html(), mimetype='text/html')
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 # Error handlers
 @app.errorhandler(404)
@@ -1195,9 +1631,62 @@ def internal_error(error):
 # APPLICATION STARTUP
 # =============================================================================
 
-if __name__ == '__main__':
+def check_password_hash_cost():
+    password_hash = generate_password_hash('benchmark', method=app.config['PASSWORD_HASH_METHOD'])
+    started = time.perf_counter()
+    check_password_hash(password_hash, 'benchmark')
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if elapsed_ms > app.config['PASSWORD_HASH_BUDGET_MS']:
+        app.logger.warning(
+            "Password verification took %.0f ms with %s (budget %d ms); consider lowering the work factor",
+            elapsed_ms, app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_BUDGET_MS']
+        )
+    return elapsed_ms
+
+def upgrade_timestamp_defaults():
+    # Databases created before the timestamp columns moved to server defaults have no DEFAULT
+    # clause, so new rows would get NULL. SQLite can't alter a column default, so each such
+    # table is rebuilt once from the current schema, backfilling any NULLs along the way.
+    if db.engine.dialect.name != 'sqlite':
+        return
+    
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            defaulted = {column.name for column in table.columns if column.server_default is not None}
+            existing = {
+                row[1]: row[4] for row in connection.exec_driver_sql(f'PRAGMA table_info("{table.name}")')
+            }
+            if not defaulted or all(existing.get(name) is not None for name in defaulted):
+                continue
+            
+            app.logger.warning("Rebuilding table %s to add timestamp defaults", table.name)
+            old_name = f'_old_{table.name}'
+            columns = [column.name for column in table.columns if column.name in existing]
+            column_list = ', '.join(f'"{name}"' for name in columns)
+            selected = [
+                f'COALESCE("{name}", CURRENT_TIMESTAMP)' if name in defaulted else f'"{name}"'
+                for name in columns
+            ]
+            
+            # Legacy rename leaves other tables' foreign keys pointing at the original name
+            connection.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+            connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"')
+            for index in table.indexes:
+                connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+            table.create(connection)
+            connection.exec_driver_sql(
+                f'INSERT INTO "{table.name}" ({column_list}) SELECT {", ".join(selected)} FROM "{old_name}"'
+            )
+            connection.exec_driver_sql(f'DROP TABLE "{old_name}"')
+            connection.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+
+def init_db():
+    check_password_hash_cost()
+    
     with app.app_context():
         db.create_all()
+        upgrade_timestamp_defaults()
         
         # Create a demo user if none exists
         if not User.query.first():
@@ -1211,15 +1700,29 @@ if __name__ == '__main__':
             )
             demo_user.set_password('demo123')
             db.session.add(demo_user)
-            db.session.commit()
             
-            # Create sample data for demo user
-            create_sample_data(demo_user.id)
-            print("✅ Demo user created: demo@student.com / demo123")
+            try:
+                db.session.flush()
+                
+                # Create sample data for demo user
+                create_sample_data(demo_user.id)
+                print("✅ Demo user created: demo@student.com / demo123")
+            except IntegrityError:
+                # Another process created it first
+                db.session.rollback()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the tables and the demo user."""
+    init_db()
+
+if __name__ == '__main__':
+    init_db()
     
     print("🚀 Starting Digital Twin Backend Server...")
     print("📊 Dashboard will be available at: http://localhost:5000")
     print("🔑 Demo login: demo@student.com / demo123")
     print("📖 API documentation: http://localhost:5000/health")
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Development server only; production runs under gunicorn via wsgi.py
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
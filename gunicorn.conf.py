@@ -0,0 +1,18 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn runs from this directory:
+    gunicorn wsgi:application
+"""
+
+bind = '0.0.0.0:5000'
+workers = 4
+worker_class = 'gthread'
+threads = 8
+
+def on_starting(server):
+    # Create tables and the demo user once in the arbiter, before any worker boots
+    from backend import app, db, init_db
+    init_db()
+    
+    # Workers are forked from this process; drop the connections opened here so none are shared
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for production serving.
+
+Run with:
+    gunicorn wsgi:application
+
+Worker settings and the one-time database bootstrap live in gunicorn.conf.py.
+Under any other server, run `flask --app backend init-db` once before starting it.
+"""
+
+from backend import app
+
+application = app